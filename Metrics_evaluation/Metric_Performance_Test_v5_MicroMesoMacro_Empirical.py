@@ -1,9 +1,14 @@
 import os
+import csv
 import glob
+import functools
 import itertools
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import seaborn as sns
 from scipy import stats
 from skimage import io, img_as_float
@@ -42,7 +47,11 @@ try:
     import torch
     import lpips
     DEVICE = 'cuda' if torch.cuda.is_available() else 'cpu'
-    loss_fn_alex = lpips.LPIPS(net='alex', verbose=False).to(DEVICE)
+    torch.set_float32_matmul_precision('high')
+    loss_fn_alex = lpips.LPIPS(net='alex', verbose=False).to(DEVICE).eval()
+    if DEVICE == 'cuda':
+        # Tensor-Core fp16 weights; inputs are stored half on device as well
+        loss_fn_alex = loss_fn_alex.half()
     ML_AVAILABLE = True
     print(f"[Init] LPIPS enabled on {DEVICE}")
 except:
@@ -56,31 +65,327 @@ try:
 except:
     print("[Init] MS-SSIM/VIF disabled")
 
-def calc_pair_metrics(p1, p2):
+TRT_AVAILABLE = False
+try:
+    import tensorrt as trt
+    TRT_AVAILABLE = ML_AVAILABLE and DEVICE == 'cuda'
+    if TRT_AVAILABLE: print("[Init] TensorRT LPIPS engine enabled")
+except:
+    pass
+
+PMS_AVAILABLE = False
+try:
+    from pytorch_msssim import ssim as t_ssim, ms_ssim as t_ms_ssim
+    PMS_AVAILABLE = ML_AVAILABLE and DEVICE == 'cuda'
+    if PMS_AVAILABLE: print("[Init] GPU-batched SSIM (pytorch_msssim) enabled")
+except:
+    pass
+
+IIO_AVAILABLE = False
+try:
+    import imageio.v3 as iio
+    IIO_AVAILABLE = True
+except:
+    pass
+
+PIQ_AVAILABLE = False
+try:
+    import piq
+    PIQ_AVAILABLE = ML_AVAILABLE and DEVICE == 'cuda'
+    if PIQ_AVAILABLE: print("[Init] GPU-batched MS-SSIM/VIF (piq) enabled")
+except:
+    pass
+
+JOBLIB_AVAILABLE = False
+try:
+    from joblib import Parallel, delayed
+    JOBLIB_AVAILABLE = True
+    print("[Init] Parallel CPU metrics enabled")
+except:
+    print("[Init] joblib disabled (serial CPU metrics)")
+
+NUMBA_AVAILABLE = False
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+    print("[Init] Numba SSIM kernel enabled")
+except:
+    pass
+
+if NUMBA_AVAILABLE:
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _ssim_fast(x, y):
+        """SSIM with skimage defaults (7x7 uniform window, sample covariance,
+        data_range=1), fused into one pass over the valid region."""
+        H, W = x.shape
+        pad = 3            # (win_size - 1) // 2 for the 7x7 window
+        NP = 49.0
+        cov_norm = NP / (NP - 1.0)
+        C1 = 0.01 ** 2
+        C2 = 0.03 ** 2
+        total = 0.0
+        for r in numba.prange(pad, H - pad):
+            rowsum = 0.0
+            for c in range(pad, W - pad):
+                sx = 0.0; sy = 0.0; sxx = 0.0; syy = 0.0; sxy = 0.0
+                for a in range(r - pad, r + pad + 1):
+                    for b in range(c - pad, c + pad + 1):
+                        xv = x[a, b]; yv = y[a, b]
+                        sx += xv; sy += yv
+                        sxx += xv * xv; syy += yv * yv; sxy += xv * yv
+                ux = sx / NP; uy = sy / NP
+                vx = cov_norm * (sxx / NP - ux * ux)
+                vy = cov_norm * (syy / NP - uy * uy)
+                vxy = cov_norm * (sxy / NP - ux * uy)
+                rowsum += ((2.0 * ux * uy + C1) * (2.0 * vxy + C2)) / \
+                          ((ux * ux + uy * uy + C1) * (vx + vy + C2))
+            total += rowsum
+        return total / ((H - 2 * pad) * (W - 2 * pad))
+
+    def ssim_fast(i1, i2):
+        return float(_ssim_fast(np.ascontiguousarray(i1, dtype=np.float64),
+                                np.ascontiguousarray(i2, dtype=np.float64)))
+
+    # Prime the JIT once so the first real pair doesn't pay compilation
+    ssim_fast(np.zeros((16, 16)), np.zeros((16, 16)))
+
+@functools.lru_cache(maxsize=512)
+def load_image(path):
+    """Decodes a PNG exactly once per path. Returns (float, uint8, lpips_tensor)."""
+    # Fast path: decode the 8-bit grayscale PNG directly and derive the
+    # float view from the uint8 buffer (one pass, no PIL float intermediate)
+    u = None
+    if IIO_AVAILABLE:
+        try:
+            u = iio.imread(path)
+            if u.ndim == 3: u = u[..., 0]
+            if u.dtype != np.uint8: u = None
+        except: u = None
+
+    if u is not None:
+        i = u.astype(np.float32, copy=False) * np.float32(1.0 / 255.0)
+    else:
+        try:
+            i = io.imread(path, as_gray=True); i = img_as_float(i)
+        except:
+            return None, None, None
+        u = (i*255).astype(np.uint8)
+    t = None
+    if ML_AVAILABLE:
+        h, w = i.shape
+        # Zero-copy view of the cached float image; single channel on host
+        t = torch.as_tensor(np.ascontiguousarray(i, dtype=np.float32)).view(1, 1, h, w)
+        if DEVICE == 'cuda':
+            # pin_memory() makes the staging copy, the upload is async, and
+            # the *2-1 normalization plus 3-channel repeat run on device so
+            # only H*W floats ever cross the bus
+            t = t.pin_memory().to(DEVICE, non_blocking=True).half()
+            t.mul_(2).sub_(1)
+            t = t.repeat(1, 3, 1, 1)
+        else:
+            # t aliases the cached image here, so normalize out of place
+            t = (t * 2 - 1).repeat(1, 3, 1, 1)
+    return i, u, t
+
+def calc_pair_metrics_arr(i1, i2, u1, u2, use_sewar=True, use_mse_psnr=True,
+                          use_ssim=True, use_ms_ssim=True):
     res = {}
     try:
-        i1 = io.imread(p1, as_gray=True); i1 = img_as_float(i1)
-        i2 = io.imread(p2, as_gray=True); i2 = img_as_float(i2)
+        if i1 is None or i2 is None: return {}
         if i1.shape != i2.shape: return {}
-        
-        res['MSE'] = mse(i1, i2)
-        res['PSNR'] = psnr(i1, i2, data_range=1.0)
-        res['SSIM'] = ssim(i1, i2, data_range=1.0)
-        
-        if SEWAR_AVAILABLE:
-            u1 = (i1*255).astype(np.uint8); u2 = (i2*255).astype(np.uint8)
+
+        if use_mse_psnr:
+            res['MSE'] = mse(i1, i2)
+            res['PSNR'] = psnr(i1, i2, data_range=1.0)
+
+        # Identity short-circuit: cache dedup can hand us the same array
+        # twice, and MSE == 0 pins every remaining metric analytically
+        if i1 is i2 or res.get('MSE') == 0.0:
+            res['MSE'] = 0.0
+            res['PSNR'] = float('inf')
+            res['SSIM'] = 1.0
+            if SEWAR_AVAILABLE and use_sewar:
+                res['VIF'] = 1.0
+                if use_ms_ssim: res['MS-SSIM'] = 1.0
+            return res
+
+        if use_ssim:
+            if NUMBA_AVAILABLE:
+                res['SSIM'] = ssim_fast(i1, i2)
+            else:
+                res['SSIM'] = ssim(i1, i2, data_range=1.0)
+
+        if SEWAR_AVAILABLE and use_sewar:
             try: res['VIF'] = vifp(u1, u2)
             except: res['VIF'] = np.nan
-            try: res['MS-SSIM'] = float(np.real(msssim(u1, u2)))
-            except: res['MS-SSIM'] = np.nan
-            
-        if ML_AVAILABLE:
-            t1 = torch.from_numpy(i1).float().view(1,1,i1.shape[0],i1.shape[1]).to(DEVICE)
-            t2 = torch.from_numpy(i2).float().view(1,1,i2.shape[0],i2.shape[1]).to(DEVICE)
-            res['LPIPS'] = loss_fn_alex(t1.repeat(1,3,1,1)*2-1, t2.repeat(1,3,1,1)*2-1).item()
+            if use_ms_ssim:
+                try: res['MS-SSIM'] = float(np.real(msssim(u1, u2)))
+                except: res['MS-SSIM'] = np.nan
     except: pass
     return res
 
+def calc_mse_psnr_batch(imgs_a, imgs_b):
+    """All-pairs MSE/PSNR via |a|^2 + |b|^2 - 2<a,b> on stacked images.
+
+    Returns (mse_matrix, psnr_matrix) or (None, None) when the folders are
+    not stackable (missing files or mixed shapes) and the per-pair path
+    should be used instead.
+    """
+    shapes = {t[0].shape for t in imgs_a + imgs_b if t[0] is not None}
+    if len(shapes) != 1 or any(t[0] is None for t in imgs_a + imgs_b):
+        return None, None
+
+    # float64 throughout: float32 cancellation noise (~2e-6 for 512x512)
+    # would swamp the tiny true MSEs of near-duplicate pairs and clamp
+    # them to 0, which the identity logic downstream must never see
+    A = np.stack([t[0].ravel() for t in imgs_a]).astype(np.float64)
+    B = np.stack([t[0].ravel() for t in imgs_b]).astype(np.float64)
+    npx = A.shape[1]
+
+    sq_a = np.einsum('ij,ij->i', A, A)
+    sq_b = np.einsum('ij,ij->i', B, B)
+    mse_m = (sq_a[:, None] + sq_b[None, :] - 2.0 * (A @ B.T)) / npx
+    np.maximum(mse_m, 0.0, out=mse_m)
+    with np.errstate(divide='ignore'):
+        psnr_m = 10.0 * np.log10(1.0 / mse_m)
+    return mse_m, psnr_m
+
+LPIPS_BATCH = 32
+
+class _TRTLpips:
+    """LPIPS distance through a TensorRT engine built for one static shape.
+
+    The AlexNet conv stack gets fused fp16 Tensor-Core kernels auto-tuned
+    for the exact [B,3,H,W] input, which is fixed by the dataset config.
+    """
+    def __init__(self, shape):
+        import io as _io
+        dummy = torch.zeros(shape, device=DEVICE, dtype=torch.float16)
+        buf = _io.BytesIO()
+        torch.onnx.export(loss_fn_alex, (dummy, dummy), buf,
+                          input_names=['ref', 'tar'], output_names=['dist'])
+
+        logger = trt.Logger(trt.Logger.WARNING)
+        builder = trt.Builder(logger)
+        network = builder.create_network(
+            1 << int(trt.NetworkDefinitionCreationFlag.EXPLICIT_BATCH))
+        parser = trt.OnnxParser(network, logger)
+        if not parser.parse(buf.getvalue()):
+            raise RuntimeError("TRT: ONNX parse failed")
+        config = builder.create_builder_config()
+        config.set_flag(trt.BuilderFlag.FP16)
+        plan = builder.build_serialized_network(network, config)
+        if plan is None:
+            raise RuntimeError("TRT: engine build failed")
+        self.engine = trt.Runtime(logger).deserialize_cuda_engine(plan)
+        self.context = self.engine.create_execution_context()
+        self.names = [self.engine.get_tensor_name(k)
+                      for k in range(self.engine.num_io_tensors)]
+        self.out = torch.empty((shape[0], 1, 1, 1), device=DEVICE, dtype=torch.float16)
+
+    def __call__(self, b1, b2):
+        b1 = b1.contiguous(); b2 = b2.contiguous()
+        for name, ptr in zip(self.names, (b1.data_ptr(), b2.data_ptr(), self.out.data_ptr())):
+            self.context.set_tensor_address(name, ptr)
+        stream = torch.cuda.current_stream()
+        self.context.execute_async_v3(stream.cuda_stream)
+        stream.synchronize()
+        return self.out
+
+_lpips_compiled = {}
+
+def _lpips_forward(b1, b2):
+    """LPIPS forward through TensorRT (or a TorchScript trace), per shape."""
+    key = tuple(b1.shape)
+    fn = _lpips_compiled.get(key)
+    if fn is None:
+        if TRT_AVAILABLE:
+            try: fn = _TRTLpips(key)
+            except Exception as e: print(f"[TRT] fallback to torch: {e}")
+        if fn is None:
+            try:
+                fn = torch.jit.trace(loss_fn_alex, (b1, b2), strict=False)
+            except Exception:
+                fn = loss_fn_alex
+        _lpips_compiled[key] = fn
+    return fn(b1, b2)
+
+def calc_lpips_batch(ts1, ts2):
+    """Runs LPIPS over many pairs in chunked batches instead of one-by-one."""
+    vals = []
+    with torch.no_grad():
+        for k in range(0, len(ts1), LPIPS_BATCH):
+            b1 = torch.cat(ts1[k:k+LPIPS_BATCH], dim=0)
+            b2 = torch.cat(ts2[k:k+LPIPS_BATCH], dim=0)
+            n = b1.shape[0]
+            if TRT_AVAILABLE and n < LPIPS_BATCH:
+                # Pad the tail chunk so one static-shape engine serves all calls
+                pad = LPIPS_BATCH - n
+                b1 = torch.cat([b1, b1[-1:].expand(pad, -1, -1, -1)], dim=0)
+                b2 = torch.cat([b2, b2[-1:].expand(pad, -1, -1, -1)], dim=0)
+            d = _lpips_forward(b1, b2)
+            vals.extend(d.float().view(-1).tolist()[:n])
+    return vals
+
+def calc_fr_batch(ts1, ts2):
+    """GPU-batched MS-SSIM and VIF on the cached LPIPS tensors (piq path)."""
+    ms_vals, vif_vals = [], []
+    with torch.no_grad():
+        for k in range(0, len(ts1), LPIPS_BATCH):
+            # Cached tensors are [1,3,H,W] in [-1,1] (fp16 on CUDA);
+            # piq wants [B,1,H,W] float32 in [0,1]
+            b1 = (torch.cat(ts1[k:k+LPIPS_BATCH], dim=0)[:, :1].float() + 1) * 0.5
+            b2 = (torch.cat(ts2[k:k+LPIPS_BATCH], dim=0)[:, :1].float() + 1) * 0.5
+            try:
+                ms = piq.multi_scale_ssim(b1, b2, data_range=1.0, reduction='none')
+                ms_vals.extend(ms.view(-1).tolist())
+            except:
+                ms_vals.extend([np.nan] * b1.shape[0])
+            try:
+                vf = piq.vif_p(b1, b2, data_range=1.0, reduction='none')
+                vif_vals.extend(vf.view(-1).tolist())
+            except:
+                vif_vals.extend([np.nan] * b1.shape[0])
+    return ms_vals, vif_vals
+
+def calc_ssim_batch(ts1, ts2):
+    """GPU-batched SSIM and MS-SSIM (pytorch_msssim) on the cached tensors."""
+    ssim_vals, ms_vals = [], []
+    with torch.no_grad():
+        for k in range(0, len(ts1), LPIPS_BATCH):
+            b1 = (torch.cat(ts1[k:k+LPIPS_BATCH], dim=0)[:, :1].float() + 1) * 0.5
+            b2 = (torch.cat(ts2[k:k+LPIPS_BATCH], dim=0)[:, :1].float() + 1) * 0.5
+            try:
+                s = t_ssim(b1, b2, data_range=1.0, size_average=False)
+                ssim_vals.extend(s.view(-1).tolist())
+            except:
+                ssim_vals.extend([np.nan] * b1.shape[0])
+            try:
+                ms = t_ms_ssim(b1, b2, data_range=1.0, size_average=False)
+                ms_vals.extend(ms.view(-1).tolist())
+            except:
+                ms_vals.extend([np.nan] * b1.shape[0])
+    return ssim_vals, ms_vals
+
+def calc_pair_metrics(p1, p2):
+    i1, u1, t1 = load_image(p1)
+    i2, u2, t2 = load_image(p2)
+    res = calc_pair_metrics_arr(i1, i2, u1, u2, use_sewar=not PIQ_AVAILABLE,
+                                use_ssim=not PMS_AVAILABLE,
+                                use_ms_ssim=not (PIQ_AVAILABLE or PMS_AVAILABLE))
+    if res and PMS_AVAILABLE:
+        ssim_vals, ms_vals = calc_ssim_batch([t1], [t2])
+        res['SSIM'] = ssim_vals[0]
+        if not PIQ_AVAILABLE:
+            res['MS-SSIM'] = ms_vals[0]
+    if res and PIQ_AVAILABLE:
+        ms_vals, vif_vals = calc_fr_batch([t1], [t2])
+        res['MS-SSIM'] = ms_vals[0]
+        res['VIF'] = vif_vals[0]
+    if res and ML_AVAILABLE:
+        res['LPIPS'] = calc_lpips_batch([t1], [t2])[0]
+    return res
+
 def get_files(folder_name, map_type):
     path = os.path.join(INPUT_DIR, folder_name)
     if not os.path.exists(path): return []
@@ -89,8 +394,16 @@ def get_files(folder_name, map_type):
     if map_type == 'Struct': return structs
     return [f.replace(".png", f"_{map_type}.png") for f in structs]
 
-def check_interval_overlap(low1, high1, low2, high2):
-    return max(low1, low2) <= min(high1, high2)
+def write_csv_rows(path, rows):
+    """Streams a list of dicts straight to CSV (no DataFrame detour)."""
+    fields = list(rows[0].keys())
+    for r in rows[1:]:
+        for k in r:
+            if k not in fields: fields.append(k)
+    with open(path, 'w', newline='') as f:
+        w = csv.DictWriter(f, fieldnames=fields, restval='')
+        w.writeheader()
+        w.writerows(rows)
 
 def run_analysis():
     if not os.path.exists(INPUT_DIR):
@@ -121,37 +434,47 @@ def run_analysis():
     stats_rows = []
     all_raw_corr = []
 
-    for mt in map_types:
-        print(f"  > Map: {mt}")
-        
-        # 1. Collect Distributions
-        distributions = {} 
-        comp_types = {}
-        
-        pairs = list(itertools.combinations_with_replacement(all_folders, 2))
-        
-        for (name_a, name_b) in pairs:
-            if name_a == name_b:
-                c_type = "Intra"
-                tag = f"Intra_{name_a}"
-            elif name_a == REFERENCE_SET:
-                c_type = "Inter"
-                tag = f"Inter_{name_b}"
-            elif name_b == REFERENCE_SET:
-                c_type = "Inter"
-                tag = f"Inter_{name_a}"
-            else:
-                c_type = "Cross"
-                tag = f"Cross_{name_a}_vs_{name_b}"
-            
-            distributions[tag] = {m: [] for m in metric_names}
-            comp_types[tag] = c_type
-            
+    # 1. Collect Distributions. Folder pairs form the outer loop and map
+    # types the inner one, so each pair cycles through all four maps while
+    # its decoded images are still warm in the image and OS page caches.
+    distributions = {mt: {} for mt in map_types}
+    comp_types = {}
+
+    pairs = list(itertools.combinations_with_replacement(all_folders, 2))
+
+    for (name_a, name_b) in pairs:
+        if name_a == name_b:
+            c_type = "Intra"
+            tag = f"Intra_{name_a}"
+        elif name_a == REFERENCE_SET:
+            c_type = "Inter"
+            tag = f"Inter_{name_b}"
+        elif name_b == REFERENCE_SET:
+            c_type = "Inter"
+            tag = f"Inter_{name_a}"
+        else:
+            c_type = "Cross"
+            tag = f"Cross_{name_a}_vs_{name_b}"
+
+        comp_types[tag] = c_type
+        print(f"  > Pair: {tag}")
+
+        raw_by_mt = {}
+
+        for mt in map_types:
+            distributions[mt][tag] = {m: [] for m in metric_names}
+
             files_a = get_files(name_a, mt)
             files_b = get_files(name_b, mt)
-            
+
+            # Decode once per file; the lru_cache keeps images warm across tags
+            imgs_a = [load_image(f) for f in files_a]
+            imgs_b = [load_image(f) for f in files_b]
+
             raw_rows = []
-            
+
+            # Enumerate all pairs up front so LPIPS can run as one batched pass
+            pair_idx = []
             for i in range(len(files_a)):
                 if c_type == "Intra":
                     j_range = range(i + 1, min(i + 1 + NEIGHBOR_DEPTH, len(files_a)))
@@ -159,61 +482,131 @@ def run_analysis():
                     j_start = max(0, i - NEIGHBOR_DEPTH)
                     j_end = min(len(files_b), i + NEIGHBOR_DEPTH + 1)
                     j_range = range(j_start, j_end)
-                
+
                 for j in j_range:
                     if c_type != "Intra" and i == j: continue
-                    
-                    res = calc_pair_metrics(files_a[i], files_b[j])
+                    pair_idx.append((i, j))
+
+            # One vectorized pass gives MSE/PSNR for every pair at once
+            mse_m, psnr_m = (None, None)
+            if pair_idx:
+                mse_m, psnr_m = calc_mse_psnr_batch(imgs_a, imgs_b)
+
+            # CPU metrics fan out across cores; LPIPS stays batched in the
+            # main process (workers must not touch the GPU)
+            work = [(imgs_a[i][0], imgs_b[j][0], imgs_a[i][1], imgs_b[j][1])
+                    for i, j in pair_idx]
+            kw = dict(use_sewar=not PIQ_AVAILABLE, use_mse_psnr=mse_m is None,
+                      use_ssim=not PMS_AVAILABLE,
+                      use_ms_ssim=not (PIQ_AVAILABLE or PMS_AVAILABLE))
+            if JOBLIB_AVAILABLE and len(work) > 1:
+                results = Parallel(n_jobs=os.cpu_count(), prefer='processes')(
+                    delayed(calc_pair_metrics_arr)(*w, **kw) for w in work)
+            else:
+                results = [calc_pair_metrics_arr(*w, **kw) for w in work]
+
+            if mse_m is not None:
+                for (i, j), res in zip(pair_idx, results):
                     if res:
-                        for m, v in res.items(): distributions[tag][m].append(v)
-                        
-                        row = {'File1': os.path.basename(files_a[i]), 'File2': os.path.basename(files_b[j])}
-                        row.update(res)
-                        raw_rows.append(row)
-                        
-                        rec = {'Map': mt, 'Type': c_type, 'Comparison': tag}
-                        rec.update(res)
-                        all_raw_corr.append(rec)
+                        res['MSE'] = float(mse_m[i, j])
+                        res['PSNR'] = float(psnr_m[i, j])
+
+            # Identity pairs get their known values directly and stay out of
+            # the batched GPU passes below
+            live = []
+            for k, ((i, j), res) in enumerate(zip(pair_idx, results)):
+                if not res: continue
+                if imgs_a[i][0] is imgs_b[j][0] or np.array_equal(imgs_a[i][1], imgs_b[j][1]):
+                    res['MSE'] = 0.0
+                    res['PSNR'] = float('inf')
+                    res['SSIM'] = 1.0
+                    if SEWAR_AVAILABLE or PIQ_AVAILABLE or PMS_AVAILABLE: res['MS-SSIM'] = 1.0
+                    if SEWAR_AVAILABLE or PIQ_AVAILABLE: res['VIF'] = 1.0
+                    if ML_AVAILABLE: res['LPIPS'] = 0.0
+                else:
+                    live.append(k)
+
+            ts_a = [imgs_a[pair_idx[k][0]][2] for k in live]
+            ts_b = [imgs_b[pair_idx[k][1]][2] for k in live]
+
+            if PMS_AVAILABLE and live:
+                ssim_vals, ms_vals = calc_ssim_batch(ts_a, ts_b)
+                for k, s_v, ms_v in zip(live, ssim_vals, ms_vals):
+                    results[k]['SSIM'] = s_v
+                    if not PIQ_AVAILABLE: results[k]['MS-SSIM'] = ms_v
+
+            if PIQ_AVAILABLE and live:
+                ms_vals, vif_vals = calc_fr_batch(ts_a, ts_b)
+                for k, ms_v, vf_v in zip(live, ms_vals, vif_vals):
+                    results[k]['MS-SSIM'] = ms_v
+                    results[k]['VIF'] = vf_v
+
+            if ML_AVAILABLE and live:
+                lp_vals = calc_lpips_batch(ts_a, ts_b)
+                for k, v in zip(live, lp_vals):
+                    results[k]['LPIPS'] = v
+
+            for (i, j), res in zip(pair_idx, results):
+                if res:
+                    # Canonical metric order regardless of which path filled it
+                    res = {m: res[m] for m in metric_names if m in res}
+                    for m, v in res.items(): distributions[mt][tag][m].append(v)
+
+                    row = {'File1': os.path.basename(files_a[i]), 'File2': os.path.basename(files_b[j])}
+                    row.update(res)
+                    raw_rows.append(row)
+
+                    rec = {'Map': mt, 'Type': c_type, 'Comparison': tag}
+                    rec.update(res)
+                    all_raw_corr.append(rec)
             
-            # Save Raw CSV
             if raw_rows:
-                pd.DataFrame(raw_rows).to_csv(os.path.join(dirs['csv'], f"{mt}_{tag}.csv"), index=False)
-
-        # 2. Compute Stats & Significance
-        # Baseline intervals
-        baseline_intervals = {}
-        base_tag = f"Intra_{REFERENCE_SET}"
-        
-        if base_tag in distributions:
-            for m in metric_names:
-                vals = distributions[base_tag][m]
-                if vals:
-                    baseline_intervals[m] = (np.percentile(vals, 2.5), np.percentile(vals, 97.5))
-                else:
-                    baseline_intervals[m] = (np.nan, np.nan)
-        
-        for tag, metrics in distributions.items():
-            for m, vals in metrics.items():
-                if not vals: continue
-                
-                mu = np.mean(vals)
-                low = np.percentile(vals, 2.5)
-                high = np.percentile(vals, 97.5)
-                
-                is_overlap = True
-                base_low, base_high = baseline_intervals.get(m, (np.nan, np.nan))
-                
-                if tag != base_tag and not np.isnan(base_low):
-                    is_overlap = check_interval_overlap(base_low, base_high, low, high)
-                
+                raw_by_mt[mt] = raw_rows
+
+        # Flush this pair's raw CSVs once all map types are done
+        for mt, raw_rows in raw_by_mt.items():
+            write_csv_rows(os.path.join(dirs['csv'], f"{mt}_{tag}.csv"), raw_rows)
+
+    # 2. Compute Stats & Significance. All tags of one (map, metric) are
+    # padded into a single NaN-filled matrix so the means, percentiles and
+    # the baseline-overlap test each run as one C-level pass.
+    base_tag = f"Intra_{REFERENCE_SET}"
+
+    for mt in map_types:
+        tags = list(distributions[mt].keys())
+        if not tags: continue
+        b_idx = tags.index(base_tag) if base_tag in tags else -1
+
+        for m in metric_names:
+            lists = [distributions[mt][t][m] for t in tags]
+            max_len = max(len(v) for v in lists)
+            if max_len == 0: continue
+
+            mat = np.full((len(tags), max_len), np.nan)
+            for r, v in enumerate(lists):
+                mat[r, :len(v)] = v
+
+            mus = np.nanmean(mat, axis=1)
+            lows, highs = np.nanpercentile(mat, [2.5, 97.5], axis=1)
+
+            have_base = b_idx >= 0 and len(lists[b_idx]) > 0
+            if have_base:
+                overlaps = np.maximum(lows[b_idx], lows) <= np.minimum(highs[b_idx], highs)
+            else:
+                overlaps = np.ones(len(tags), dtype=bool)
+
+            for r, tag in enumerate(tags):
+                if not lists[r]: continue
+                is_overlap = bool(overlaps[r]) if (have_base and tag != base_tag) else True
                 stats_rows.append({
                     'Map': mt, 'Comparison': tag, 'Type': comp_types[tag], 'Metric': m,
-                    'Mean': mu, 'P_2_5': low, 'P_97_5': high,
+                    'Mean': mus[r], 'P_2_5': lows[r], 'P_97_5': highs[r],
                     'Diagnostic_Power': not is_overlap
                 })
 
     # Save Results
-    pd.DataFrame(stats_rows).to_csv(os.path.join(OUTPUT_DIR, "Summary_Stats.csv"), index=False)
+    if stats_rows:
+        write_csv_rows(os.path.join(OUTPUT_DIR, "Summary_Stats.csv"), stats_rows)
     
     # Generate Plots
     def get_color(c):
@@ -222,20 +615,32 @@ def run_analysis():
         return '#1f77b4'
 
     print("  > Plotting...")
+    # Build and sort the DataFrame once; the loops below only take views
+    df_all = pd.DataFrame(stats_rows)
+    groups = {}
+    if not df_all.empty:
+        comp = df_all['Comparison'].astype(str)
+        # Sort: Intra, Inter, Cross
+        df_all['sort'] = np.where(comp.str.contains('Intra'), 0,
+                                  np.where(comp.str.contains('Inter'), 1, 2))
+        df_all = df_all.sort_values(['sort', 'Comparison'])
+        groups = {k: g for k, g in df_all.groupby(['Metric', 'Map'])}
+
+    # One reusable Figure driven through the Agg canvas directly; clearing
+    # it between metrics avoids the pyplot state machine entirely
+    fig = Figure(figsize=(24, 8), constrained_layout=True)
+    canvas = FigureCanvasAgg(fig)
+
     for m in metric_names:
-        fig, axes = plt.subplots(1, 4, figsize=(24, 8), constrained_layout=True)
+        fig.clf()
+        axes = fig.subplots(1, 4)
         fig.suptitle(f"Metric Performance: {m} (Empirical 95% Interval)", fontsize=20)
-        
+
         for idx, mt in enumerate(map_types):
             ax = axes[idx]
-            data = pd.DataFrame(stats_rows)
-            data = data[(data['Map']==mt) & (data['Metric']==m)]
-            if data.empty: continue
-            
-            # Sort: Intra, Inter, Cross
-            data['sort'] = data['Comparison'].apply(lambda x: 0 if 'Intra' in x else (1 if 'Inter' in x else 2))
-            data = data.sort_values(['sort', 'Comparison'])
-            
+            data = groups.get((m, mt))
+            if data is None or data.empty: continue
+
             cols = [get_color(c) for c in data['Comparison']]
             yerr = [data['Mean'] - data['P_2_5'], data['P_97_5'] - data['Mean']]
             
@@ -249,8 +654,7 @@ def run_analysis():
                     y_pos = row.P_97_5 + (row.P_97_5 - row.P_2_5)*0.1
                     ax.text(i, y_pos, '*', ha='center', fontsize=20)
 
-        plt.savefig(os.path.join(dirs['plots'], f"Plot_{m}.png"))
-        plt.close()
+        canvas.print_png(os.path.join(dirs['plots'], f"Plot_{m}.png"))
 
     print(f"[Done] Check {OUTPUT_DIR}")
 
@@ -4,6 +4,7 @@ import numpy as np
 import warnings
 import time
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from skimage import io, img_as_float, transform
 from skimage.metrics import structural_similarity as ssim
 from skimage.metrics import mean_squared_error as mse
@@ -143,36 +144,34 @@ def run_experiment_pipeline():
         scan_b = f"Scan_{exp_name}_B.png"
         
         # === ВЫЗОВ EXE ===
-        print(f"Scanning Phantom A (via EXE)...")
-        try:
-            subprocess.run(
-                [SCANNER_EXE, config.config_filename, file_a, scan_a],
-                check=True,
-                capture_output=True,
+        # A and B scans are independent, so both run concurrently
+        print(f"Scanning Phantoms A and B (via EXE, concurrent)...")
+        procs = []
+        for scat_file, scan_file in ((file_a, scan_a), (file_b, scan_b)):
+            procs.append((scan_file, subprocess.Popen(
+                [SCANNER_EXE, config.config_filename, scat_file, scan_file],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
                 text=True
-            )
-        except subprocess.CalledProcessError as e:
-            print(f"\n!!! SCANNER EXE CRASHED !!!")
-            print(f"Exit Code: {e.returncode}")
-            print(f"STDERR:\n{e.stderr}") 
-            return 
-
-        print(f"Scanning Phantom B (via EXE)...")
-        try:
-            subprocess.run(
-                [SCANNER_EXE, config.config_filename, file_b, scan_b],
-                check=True,
-                capture_output=True,
-                text=True
-            )
-        except subprocess.CalledProcessError as e:
-            print(f"\n!!! SCANNER EXE CRASHED !!!")
-            print(f"STDERR:\n{e.stderr}")
+            )))
+
+        failed = False
+        for scan_file, p in procs:
+            err = p.communicate()[1]
+            if p.returncode != 0:
+                print(f"\n!!! SCANNER EXE CRASHED ({scan_file}) !!!")
+                print(f"Exit Code: {p.returncode}")
+                print(f"STDERR:\n{err}")
+                failed = True
+        if failed:
             return
-        
+
         print(f"Generating Maps...")
-        maps_a = Processor.generate_maps(scan_a)
-        maps_b = Processor.generate_maps(scan_b)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            fut_a = pool.submit(Processor.generate_maps, scan_a)
+            fut_b = pool.submit(Processor.generate_maps, scan_b)
+            maps_a = fut_a.result()
+            maps_b = fut_b.result()
         
         print(f"Calculating Metrics (A vs B)...")
         map_types = ['Struct', 'OAC', 'SC', 'RSC']
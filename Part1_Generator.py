@@ -53,31 +53,39 @@ class ScattererGenerator:
         amp: Backscattering Energy in Percent (0..100).
              1.0 means 1% of energy is reflected back.
         """
-        if seed is not None:
-            np.random.seed(seed)
-            
+        # PCG64 generator and a single float32 draw instead of four
+        # legacy rand passes plus a column_stack copy
+        rng = np.random.default_rng(seed)
+
         count = self.cfg.scatterers_count
-        xs = (np.random.rand(count) - 0.5) * self.cfg.x_max
-        ys = (np.random.rand(count) - 0.5) * (2 * self.cfg.beam_radius)
-        zs = np.random.rand(count) * self.cfg.z_max
-        amps = np.ones(count) * amp
-        
-        return np.column_stack((xs, ys, zs, amps))
+        rnd = rng.random((count, 3), dtype=np.float32)
+
+        out = np.empty((count, 4), dtype=np.float32)
+        out[:, 0] = (rnd[:, 0] - 0.5) * self.cfg.x_max
+        out[:, 1] = (rnd[:, 1] - 0.5) * (2 * self.cfg.beam_radius)
+        out[:, 2] = rnd[:, 2] * self.cfg.z_max
+        out[:, 3] = amp
+
+        return out
 
     def generate_two_layers(self, seed=None, boundary_z_mcm=500.0, amp_top=1.0, amp_bottom=5.0):
         """
         amp_top, amp_bottom: Backscattering Energy in Percent (0..100).
         """
-        if seed is not None:
-            np.random.seed(seed)
-            
         data = self.generate_uniform(seed, amp=amp_top)
-        zs = data[:, 2]
-        
-        mask_bottom = zs > boundary_z_mcm
-        data[mask_bottom, 3] = amp_bottom
-        
+        data[:, 3] = np.where(data[:, 2] > boundary_z_mcm,
+                              np.float32(amp_bottom), np.float32(amp_top))
         return data
 
-    def save_to_file(self, data, filename):
-        np.savetxt(filename, data, fmt='%.4e')
+    def save_to_file(self, data, filename, binary=False):
+        """
+        binary=True dumps raw float32 rows (x, y, z, energy) — a plain
+        memory copy instead of per-value text formatting, and 3-4x smaller
+        on disk. The default stays the text format Part2_Scanner.exe parses.
+        """
+        if binary:
+            data.astype(np.float32).tofile(filename)
+        else:
+            # A 1 MB write buffer keeps savetxt from flushing line-by-line
+            with open(filename, 'wb', buffering=1 << 20) as f:
+                np.savetxt(f, data, fmt='%.4e')
@@ -1,14 +1,229 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.ndimage import uniform_filter
+from scipy.ndimage import uniform_filter1d
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import os
 
+try:
+    import imageio.v3 as iio
+    IIO_AVAILABLE = True
+except ImportError:
+    IIO_AVAILABLE = False
+
+CUPY_AVAILABLE = False
+try:
+    import cupy as cp
+    import cupyx.scipy.ndimage as cp_ndi
+    cp.cuda.runtime.getDeviceCount()
+    CUPY_AVAILABLE = True
+except Exception:
+    CUPY_AVAILABLE = False
+
+NUMBA_AVAILABLE = False
+try:
+    from numba import njit, prange
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _oac_kernel(intensity, h_px):
+        """Bottom-up column cumulative sum and attenuation formula fused
+        into a single pass, parallel over columns.
+
+        The running sum lives in a scalar per column, so the step touches
+        one read and one write per pixel instead of materializing the
+        reversed cumsum and denominator arrays."""
+        H, W = intensity.shape
+        mu = np.empty_like(intensity)
+        for j in prange(W):
+            acc = 0.0
+            for i in range(H - 1, -1, -1):
+                v = intensity[i, j]
+                acc += v
+                mu[i, j] = v / (2.0 * h_px * (acc - 0.5 * v + 1e-10))
+        return mu
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _sc_horiz_kernel(mean1, msq1, window_size):
+        """Horizontal half of the speckle box filter: slides one
+        accumulator pair per row over the vertically filtered statistics
+        and emits the contrast directly."""
+        H, W = mean1.shape
+        half = window_size // 2
+        sc = np.empty((H, W), dtype=mean1.dtype)
+        for i in prange(H):
+            s = 0.0
+            sq = 0.0
+            for k in range(-half, window_size - half):
+                kk = min(max(k, 0), W - 1)
+                s += mean1[i, kk]
+                sq += msq1[i, kk]
+            for j in range(W):
+                m = s / window_size
+                var = sq / window_size - m * m
+                if var < 0.0:
+                    var = 0.0
+                sc[i, j] = np.sqrt(var) / (m + 1e-10)
+                rem = min(max(j - half, 0), W - 1)
+                add = min(max(j + window_size - half, 0), W - 1)
+                # Add and subtract separately: a fused float32 difference
+                # would poison the float64 accumulators with round-off that
+                # never cancels once the window leaves a bright region
+                s += mean1[i, add]
+                s -= mean1[i, rem]
+                sq += msq1[i, add]
+                sq -= msq1[i, rem]
+        return sc
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _sc_kernel(data, window_size):
+        """Separable sliding-window speckle contrast: one accumulator pair
+        (sum, sum of squares) per lane, two passes total.
+
+        Borders clamp to the edge instead of scipy's 'reflect', but the
+        caller overwrites the border band anyway and every interior pixel
+        only sees fully in-bounds windows, so the retained region matches
+        the scipy path."""
+        H, W = data.shape
+        half = window_size // 2
+        mean1 = np.empty((H, W), dtype=data.dtype)
+        msq1 = np.empty((H, W), dtype=data.dtype)
+        # Pass 1: vertical window per column
+        for j in prange(W):
+            s = 0.0
+            sq = 0.0
+            for k in range(-half, window_size - half):
+                kk = min(max(k, 0), H - 1)
+                v = data[kk, j]
+                s += v
+                sq += v * v
+            for i in range(H):
+                mean1[i, j] = s / window_size
+                msq1[i, j] = sq / window_size
+                rem = min(max(i - half, 0), H - 1)
+                add = min(max(i + window_size - half, 0), H - 1)
+                vr = data[rem, j]
+                va = data[add, j]
+                # Separate add/subtract keeps the updates in float64; see
+                # the note in the horizontal kernel
+                s += va
+                s -= vr
+                sq += va * va
+                sq -= vr * vr
+        # Pass 2: horizontal window per row
+        return _sc_horiz_kernel(mean1, msq1, window_size)
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _oac_sc_vert_kernel(intensity, h_px, window_size):
+        """Single bottom-up sweep per column that writes the OAC map and
+        the vertical half of the SC box filter in the same read of the
+        intensity: after adding row i the accumulators cover rows
+        [i, i + window - 1], which is exactly the window centred on
+        i + window//2, so that row's statistics are emitted with a delay.
+
+        Rows above window//2 get truncated windows; they lie in the border
+        band the caller overwrites, and are clamp-filled afterwards so no
+        uninitialized values ever leave the kernel."""
+        H, W = intensity.shape
+        half = window_size // 2
+        mu = np.empty_like(intensity)
+        mean1 = np.empty_like(intensity)
+        msq1 = np.empty_like(intensity)
+        for j in prange(W):
+            acc = 0.0
+            s = 0.0
+            sq = 0.0
+            for i in range(H - 1, -1, -1):
+                v = intensity[i, j]
+                acc += v
+                mu[i, j] = v / (2.0 * h_px * (acc - 0.5 * v + 1e-10))
+                s += v
+                sq += v * v
+                drop = i + window_size
+                if drop < H:
+                    vd = intensity[drop, j]
+                    s -= vd
+                    sq -= vd * vd
+                c = i + half
+                if c < H:
+                    mean1[c, j] = s / window_size
+                    msq1[c, j] = sq / window_size
+            for c in range(half):
+                mean1[c, j] = mean1[half, j]
+                msq1[c, j] = msq1[half, j]
+        return mu, mean1, msq1
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _quantize_kernel(data, vmin, scale):
+        """Normalization, clip and uint8 quantization fused into one pass.
+
+        Truncation (not rounding) with the scale carrying the x256 factor
+        mirrors matplotlib's colormap LUT indexing. Pixels sitting exactly
+        on a LUT boundary can still differ by one grey level because this
+        pass runs fused in float64 while matplotlib normalizes in separate
+        float32 steps."""
+        H, W = data.shape
+        out = np.empty((H, W), dtype=np.uint8)
+        for i in prange(H):
+            for j in range(W):
+                v = (data[i, j] - vmin) * scale
+                if v < 0.0:
+                    v = 0.0
+                elif v > 255.0:
+                    v = 255.0
+                out[i, j] = np.uint8(v)
+        return out
+
+    # Prime the JIT at import so the first real scan pays no compile cost
+    _oac_kernel(np.ones((4, 4), dtype=np.float32), 6.0)
+    _sc_kernel(np.ones((8, 8), dtype=np.float32), 4)
+    _oac_sc_vert_kernel(np.ones((8, 8), dtype=np.float32), 6.0, 4)
+    _quantize_kernel(np.ones((4, 4), dtype=np.float32), 0.0, 255.0)
+    NUMBA_AVAILABLE = True
+except Exception:
+    NUMBA_AVAILABLE = False
+
 # ==========================================
 # CONFIGURATION (Dataset Specific)
 # ==========================================
 HPX = 6.0        # Pixel size (microns) - Updated to Zenodo spec
 WINDOW_SIZE = 20 # Window for Speckle Contrast
 
+# 8-bit PNGs carry only 256 distinct pixel values, so linearization is a
+# table lookup (one gather per pixel) rather than a transcendental per pixel
+_LIN_LUT = 10.0 ** (np.arange(256, dtype=np.float32) / np.float32(255.0) * np.float32(4.0))
+
+# 10 ** (4 P) written as exp2(P * 4 log2 10): exp2 vectorizes ~1.5x faster
+# than exp here, and the constant is folded once at import
+_LIN_C = np.float32(4.0 * np.log2(10.0))
+
+# Equal channel weights, applied as one BLAS reduction instead of
+# np.mean's strided sum plus divide (matches the old channel mean exactly)
+_RGB_W = np.array([1.0 / 3.0, 1.0 / 3.0, 1.0 / 3.0], dtype=np.float32)
+
+def _plt():
+    # matplotlib costs hundreds of ms at import and only the rare decode
+    # and save fallbacks need it, so it loads on first use
+    import matplotlib.pyplot as plt
+    return plt
+
+# Shared worker pool, reused across images: the map kernels release the GIL
+# (numba/scipy) and the PNG encodes are IO-bound, so threads overlap well
+_POOL = ThreadPoolExecutor(max_workers=4)
+
+# Per-thread scratch buffers keyed by (shape, dtype), reused across the
+# SC and RSC calls of a batch run (thread-local because the maps are
+# computed on pool threads)
+_scratch = threading.local()
+
+def _scratch_buffer(shape, dtype):
+    buffers = getattr(_scratch, 'buffers', None)
+    if buffers is None:
+        buffers = _scratch.buffers = {}
+    key = (shape, np.dtype(dtype))
+    buf = buffers.get(key)
+    if buf is None:
+        buf = buffers[key] = np.empty(shape, dtype)
+    return buf
+
 def load_and_linearize_image(filename):
     """
     Loads PNG and restores Linear Intensity.
@@ -16,51 +231,141 @@ def load_and_linearize_image(filename):
     """
     if not os.path.exists(filename):
         raise FileNotFoundError(f"File {filename} not found.")
-        
-    img = plt.imread(filename)
-    if img.ndim == 3:
-        if img.shape[2] == 4: img = img[:, :, :3]
-        img = np.mean(img, axis=2)
-    
-    if img.max() > 1.0:
-        img = img / 255.0
-        
-    # Linearization: I = 10^(4 * P) -> 4 comes from 40dB / 10
-    intensity = 10.0 ** (img * 4.0)
+
+    img = None
+    if IIO_AVAILABLE:
+        # Direct 8-bit grayscale decode: no RGBA float intermediate and
+        # no channel-mean pass (the scans are single-channel PNGs)
+        try:
+            img = iio.imread(filename)
+            if img.ndim == 3:
+                img = img[:, :, 0]
+            if img.dtype == np.uint8:
+                return _LIN_LUT[img]
+            if img.dtype.kind in 'ui':
+                # 16-bit PNGs decode as uint16: scale by the dtype's full
+                # range, not 255
+                img = img.astype(np.float32) / np.float32(np.iinfo(img.dtype).max)
+            else:
+                img = img.astype(np.float32, copy=False)
+        except Exception:
+            img = None
+
+    if img is None:
+        # Fallback for exotic inputs
+        img = _plt().imread(filename)
+        if img.dtype == np.uint8:
+            # The 0..255 scaling is deterministic from the dtype; no need
+            # to probe the whole image with max()
+            img = img.astype(np.float32) * np.float32(1.0 / 255.0)
+        if img.ndim == 3:
+            img = img[..., :3] @ _RGB_W
+        img = img.astype(np.float32, copy=False)
+
+    # Linearization: I = 10^(4 * P) -> 4 comes from 40dB / 10.
+    # Computed in place: one vectorized pass and one temporary
+    intensity = np.multiply(img, _LIN_C, dtype=np.float32)
+    np.exp2(intensity, out=intensity)
     return intensity
 
+def _fill_border(sc_map, border):
+    """Overwrites the border band with the nearest interior value in place."""
+    sc_map[:border, :] = sc_map[border:border + 1, :]
+    sc_map[-border:, :] = sc_map[-border - 1:-border, :]
+    sc_map[:, :border] = sc_map[:, border:border + 1]
+    sc_map[:, -border:] = sc_map[:, -border - 1:-border]
+    return sc_map
+
+def _sc_finish(mean1, msq1, window_size=WINDOW_SIZE):
+    """Completes the SC map from the fused kernel's vertical statistics."""
+    return _fill_border(_sc_horiz_kernel(mean1, msq1, window_size),
+                        window_size // 2)
+
 def calculate_oac(intensity, h_px):
-    epsilon = 1e-10
-    I_rev = intensity[::-1, :]
-    cumsum_rev = np.cumsum(I_rev, axis=0)
-    cumsum_from_bottom = cumsum_rev[::-1, :]
-    denom_term = cumsum_from_bottom - 0.5 * intensity
-    mu = intensity / (2 * h_px * (denom_term + epsilon))
-    return mu
+    if CUPY_AVAILABLE:
+        # A discrete GPU has ~10x the memory bandwidth of the host; the
+        # transfer pays for itself on large scans and batches
+        x = cp.asarray(intensity)
+        csum = cp.cumsum(x[::-1, :], axis=0)[::-1, :]
+        mu = x / (2.0 * h_px * (csum - 0.5 * x + 1e-10))
+        return cp.asnumpy(mu)
+    if NUMBA_AVAILABLE:
+        return _oac_kernel(np.ascontiguousarray(intensity), h_px)
+    # Reverse cumulative sum written straight into the output buffer via a
+    # flipped view, then the attenuation algebra in place: one allocation
+    # for the whole step instead of a materialized cumsum plus temporaries
+    denom = np.empty_like(intensity)
+    np.cumsum(intensity[::-1, :], axis=0, out=denom[::-1, :])
+    denom -= np.float32(0.5) * intensity
+    denom += np.float32(1e-10)
+    denom *= np.float32(2.0 * h_px)
+    np.divide(intensity, denom, out=denom)
+    return denom
 
 def calculate_speckle_contrast_map(data, window_size=20):
-    mean_val = uniform_filter(data, size=window_size, mode='reflect')
-    mean_sq_val = uniform_filter(data**2, size=window_size, mode='reflect')
-    var_val = mean_sq_val - mean_val**2
-    var_val[var_val < 0] = 0 
-    std_val = np.sqrt(var_val)
-    sc_map = std_val / (mean_val + 1e-10)
-    
-    # Crop borders to avoid artifacts
-    border = window_size // 2
-    sc_map_cropped = sc_map[border:-border, border:-border]
-    
-    # Pad back to original size to keep image dimensions consistent for SSIM
-    sc_map_padded = np.pad(sc_map_cropped, border, mode='edge')
-    return sc_map_padded
+    if CUPY_AVAILABLE:
+        x = cp.asarray(data)
+        mean_val = cp_ndi.uniform_filter(x, size=window_size, mode='reflect')
+        mean_sq = cp_ndi.uniform_filter(x * x, size=window_size, mode='reflect')
+        var_val = cp.maximum(mean_sq - mean_val * mean_val, 0.0)
+        sc_map = cp.asnumpy(cp.sqrt(var_val) / (mean_val + 1e-10))
+        return _fill_border(sc_map, window_size // 2)
+    if NUMBA_AVAILABLE:
+        sc_map = _sc_kernel(np.ascontiguousarray(data), window_size)
+        return _fill_border(sc_map, window_size // 2)
+    # The box filter is separable: run its two 1-D sweeps explicitly so the
+    # mean and mean-of-squares statistics filter in place, leaving the
+    # squared image as the only full-size temporary
+    # The mean buffer is purely internal, so it comes from the per-thread
+    # scratch pool; the variance buffer is returned to the caller as the
+    # map itself and therefore has to be a fresh allocation
+    mean_val = _scratch_buffer(data.shape, data.dtype)
+    uniform_filter1d(data, window_size, axis=0, mode='reflect', output=mean_val)
+    uniform_filter1d(mean_val, window_size, axis=1, mode='reflect', output=mean_val)
+
+    var_val = np.multiply(data, data, dtype=np.float32)
+    uniform_filter1d(var_val, window_size, axis=0, mode='reflect', output=var_val)
+    uniform_filter1d(var_val, window_size, axis=1, mode='reflect', output=var_val)
+    var_val -= mean_val * mean_val
+    np.maximum(var_val, 0.0, out=var_val)
+    np.sqrt(var_val, out=var_val)
+    mean_val += np.float32(1e-10)
+    sc_map = np.divide(var_val, mean_val, out=var_val)
 
-def save_map(data, filename, vmin=None, vmax=None):
+    # Overwrite the border artifacts with the nearest interior value in
+    # place: same result as the old crop + edge-pad round trip without
+    # allocating two more full-size arrays
+    return _fill_border(sc_map, window_size // 2)
+
+def save_map(data, filename, vmin=None, vmax=None, use_mpl=False):
     """Saves a normalized grayscale map for metric comparison."""
     if vmin is None: vmin = np.min(data)
     if vmax is None: vmax = np.max(data)
-    
-    norm_data = np.clip((data - vmin) / (vmax - vmin + 1e-10), 0, 1)
-    plt.imsave(filename, norm_data, cmap='gray')
+
+    if IIO_AVAILABLE and not use_mpl:
+        # Single-channel uint8 straight to libpng: no colormap dispatch, no
+        # Agg figure machinery, and a quarter the bytes of matplotlib's RGBA.
+        # plt.imsave re-stretched the clipped map to its own min/max before
+        # quantizing through the colormap LUT (floor of the stretched value
+        # x 256, capped at 255); fold stretch and LUT indexing into one
+        # affine so the files stay within one grey level of the historical
+        # output (boundary pixels can differ: see _quantize_kernel)
+        span = vmax - vmin + 1e-10
+        n_lo = min(max((np.min(data) - vmin) / span, 0.0), 1.0)
+        n_hi = min(max((np.max(data) - vmin) / span, 0.0), 1.0)
+        eff_vmin = vmin + n_lo * span
+        eff_scale = 256.0 / ((n_hi - n_lo) * span + 1e-10)
+        if NUMBA_AVAILABLE:
+            # Normalize, clip and quantize in one fused pass
+            out = _quantize_kernel(np.ascontiguousarray(data, dtype=np.float32),
+                                   float(eff_vmin), float(eff_scale))
+        else:
+            out = np.clip((data - eff_vmin) * eff_scale, 0, 255)
+            out = out.astype(np.uint8)
+        iio.imwrite(filename, out)
+    else:
+        norm_data = np.clip((data - vmin) / (vmax - vmin + 1e-10), 0, 1)
+        _plt().imsave(filename, norm_data, cmap='gray')
 
 def generate_maps(input_image_path):
     """
@@ -73,21 +378,39 @@ def generate_maps(input_image_path):
     # 1. Load
     intensity = load_and_linearize_image(input_image_path)
     
-    # 2. OAC
-    mu_map = calculate_oac(intensity, HPX)
+    # 2. OAC (fused with the vertical half of the SC filter when numba is
+    # up: both sweeps read every intensity pixel, so they share one pass)
     oac_path = base_name + "_OAC.png"
-    # OAC limits: usually 0 to 99th percentile
-    save_map(mu_map, oac_path, vmin=np.min(mu_map), vmax=np.percentile(mu_map, 99))
-    
-    # 3. SC (on Intensity)
-    sc_map = calculate_speckle_contrast_map(intensity, WINDOW_SIZE)
+    if NUMBA_AVAILABLE and not CUPY_AVAILABLE:
+        mu_map, sc_mean1, sc_msq1 = _oac_sc_vert_kernel(
+            np.ascontiguousarray(intensity), HPX, WINDOW_SIZE)
+        sc_future = _POOL.submit(_sc_finish, sc_mean1, sc_msq1)
+    else:
+        mu_map = calculate_oac(intensity, HPX)
+        sc_future = _POOL.submit(calculate_speckle_contrast_map, intensity, WINDOW_SIZE)
+
+    # 3/4. SC (on Intensity) and RSC (on OAC) are independent of each
+    # other, so both run concurrently; the three PNG encodes overlap too
+    rsc_future = _POOL.submit(calculate_speckle_contrast_map, mu_map, WINDOW_SIZE)
+
+    # OAC limits: usually 0 to 99th percentile. One cut point only, so an
+    # O(N) introselect beats np.percentile's full partial sort
+    flat = mu_map.ravel()
+    k = int(0.99 * (flat.size - 1))
+    vmax_99 = np.partition(flat, k)[k]
+    saves = [_POOL.submit(save_map, mu_map, oac_path,
+                          vmin=np.min(mu_map), vmax=vmax_99)]
+
     sc_path = base_name + "_SC.png"
-    save_map(sc_map, sc_path, vmin=0.5, vmax=5.0) # Standard limits
-    
-    # 4. RSC (on OAC)
-    rsc_map = calculate_speckle_contrast_map(mu_map, WINDOW_SIZE)
+    saves.append(_POOL.submit(save_map, sc_future.result(), sc_path,
+                              vmin=0.5, vmax=5.0)) # Standard limits
+
     rsc_path = base_name + "_RSC.png"
-    save_map(rsc_map, rsc_path, vmin=0.5, vmax=5.0)
+    saves.append(_POOL.submit(save_map, rsc_future.result(), rsc_path,
+                              vmin=0.5, vmax=5.0))
+
+    for s in saves:
+        s.result()
     
     print(f"[Processor] Generated maps for {input_image_path}")
     
@@ -98,6 +421,71 @@ def generate_maps(input_image_path):
         'RSC': rsc_path
     }
 
+def generate_maps_batch(input_image_paths):
+    """
+    Batch version of generate_maps for a list of B-scans.
+
+    Decodes every frame up front, computes OAC over the whole stack, and
+    overlaps all SC/RSC kernels and PNG encodes through the shared pool,
+    so per-image Python overhead is paid once per batch instead of once
+    per frame. Returns one path dict per input, in input order.
+    """
+    if not input_image_paths:
+        return []
+
+    intensities = list(_POOL.map(load_and_linearize_image, input_image_paths))
+
+    if NUMBA_AVAILABLE or len({a.shape for a in intensities}) > 1:
+        # The JIT kernel already saturates the cores per frame
+        mu_maps = [calculate_oac(a, HPX) for a in intensities]
+    else:
+        # Without numba, one vectorized pass over the (N, H, W) stack
+        # beats N separate cumsum calls
+        stack = np.stack(intensities)
+        denom = np.empty_like(stack)
+        np.cumsum(stack[:, ::-1, :], axis=1, out=denom[:, ::-1, :])
+        denom -= np.float32(0.5) * stack
+        denom += np.float32(1e-10)
+        denom *= np.float32(2.0 * HPX)
+        np.divide(stack, denom, out=denom)
+        mu_maps = list(denom)
+
+    sc_futs = [_POOL.submit(calculate_speckle_contrast_map, a, WINDOW_SIZE)
+               for a in intensities]
+    rsc_futs = [_POOL.submit(calculate_speckle_contrast_map, m, WINDOW_SIZE)
+                for m in mu_maps]
+
+    results = []
+    saves = []
+    for path, mu_map, sc_fut, rsc_fut in zip(input_image_paths, mu_maps,
+                                             sc_futs, rsc_futs):
+        base_name = os.path.splitext(path)[0]
+        oac_path = base_name + "_OAC.png"
+        sc_path = base_name + "_SC.png"
+        rsc_path = base_name + "_RSC.png"
+
+        flat = mu_map.ravel()
+        k = int(0.99 * (flat.size - 1))
+        saves.append(_POOL.submit(save_map, mu_map, oac_path,
+                                  vmin=np.min(mu_map),
+                                  vmax=np.partition(flat, k)[k]))
+        saves.append(_POOL.submit(save_map, sc_fut.result(), sc_path,
+                                  vmin=0.5, vmax=5.0))
+        saves.append(_POOL.submit(save_map, rsc_fut.result(), rsc_path,
+                                  vmin=0.5, vmax=5.0))
+        results.append({
+            'Struct': path,
+            'OAC': oac_path,
+            'SC': sc_path,
+            'RSC': rsc_path
+        })
+
+    for s in saves:
+        s.result()
+
+    print(f"[Processor] Generated maps for {len(results)} scans (batch)")
+    return results
+
 if __name__ == "__main__":
     # Test run (requires Test_Scan.png from Part 2)
     if os.path.exists("Test_Scan.png"):